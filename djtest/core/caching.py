@@ -0,0 +1,119 @@
+# core/caching.py
+
+import math
+import random
+import time
+import uuid
+
+from django.core.cache import cache
+
+# Entries are kept in the cache for STALE_GRACE seconds past their logical
+# TTL so they can still be served while one request rebuilds them.
+DEFAULT_TTL = 60 * 5
+STALE_GRACE = 60 * 5
+
+# XFetch tuning: values > 1 refresh earlier, values < 1 refresh later.
+EARLY_REFRESH_BETA = 1.0
+
+# The rebuild lock must outlive the slowest rebuild; waiters give up sooner
+# and compute on their own so a crashed lock holder cannot stall requests.
+LOCK_TIMEOUT = 10
+WAIT_TIMEOUT = 5
+WAIT_INTERVAL = 0.02
+
+
+# Deletes the lock only while it still holds our token. Doing the check and
+# the delete in one step means a lock that expired and was taken over by
+# another request is never released by us.
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _release_lock(lock_key, token):
+    client = getattr(cache, "client", None)
+    if hasattr(client, "get_client"):  # django-redis
+        client.get_client(write=True).eval(
+            _RELEASE_LOCK_SCRIPT, 1, client.make_key(lock_key), client.encode(token)
+        )
+    elif cache.get(lock_key) == token:
+        # Backends without scripting (local memory in tests) check, then delete
+        cache.delete(lock_key)
+
+
+def _should_refresh_early(entry, now, beta):
+    # Probabilistic early expiration ("XFetch"): the closer we get to expiry and
+    # the longer the last rebuild took, the likelier a request refreshes early.
+    return now - entry["delta"] * beta * math.log(1.0 - random.random()) >= entry["expires"]
+
+
+def _compute_and_store(key, compute, ttl):
+    start = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - start
+    entry = {"value": value, "delta": delta, "expires": time.time() + ttl}
+    cache.set(key, entry, ttl + STALE_GRACE)
+    return value
+
+
+def get_or_compute(key, compute, ttl=DEFAULT_TTL, beta=EARLY_REFRESH_BETA):
+    """
+    Return the cached value for ``key``, calling ``compute()`` to rebuild it.
+
+    Only one caller rebuilds a missing or expiring entry at a time: the
+    rebuilder holds a ``cache.add`` lock (SET NX on Redis) while the others
+    get the stale value if there is one, or wait briefly for the fresh one.
+    """
+    entry = cache.get(key)
+    now = time.time()
+    if entry is not None and now < entry["expires"] and not _should_refresh_early(entry, now, beta):
+        return entry["value"]
+
+    lock_key = f"{key}:lock"
+    token = uuid.uuid4().hex
+    if cache.add(lock_key, token, LOCK_TIMEOUT):
+        try:
+            # The previous holder may have stored a fresh value between our
+            # read and taking the lock.
+            latest = cache.get(key)
+            if latest is not None and latest["expires"] > (entry["expires"] if entry else now):
+                return latest["value"]
+            return _compute_and_store(key, compute, ttl)
+        finally:
+            _release_lock(lock_key, token)
+
+    if entry is not None:
+        # Someone else is rebuilding; the stale value is good enough meanwhile.
+        return entry["value"]
+
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry["value"]
+    return compute()
+
+
+def _generation_key(user_id):
+    return f"notes:gen:{user_id}"
+
+
+def note_cache_key(user_id, *parts):
+    """Build a per-user notes cache key scoped to the user's current generation."""
+    # Generations start from a timestamp so an evicted counter never reuses
+    # the number of an older, still cached generation.
+    generation = cache.get_or_set(_generation_key(user_id), time.time_ns, None)
+    return ":".join(["notes", str(user_id), str(generation), *map(str, parts)])
+
+
+def invalidate_user_notes(user_id):
+    """Drop every cached notes entry for one user by bumping their generation."""
+    key = _generation_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
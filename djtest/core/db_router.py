@@ -0,0 +1,82 @@
+# core/db_router.py
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+PRIMARY_DB = "default"
+
+# Set by replica_reads() around views whose reads may be served by a replica.
+_replica_reads_enabled = ContextVar("replica_reads_enabled", default=False)
+
+# alias -> (healthy, checked_at); kept per process so a dead replica costs one
+# failed connection attempt per REPLICA_HEALTH_CHECK_INTERVAL, not per query.
+_replica_health = {}
+
+
+def _pin_key(user_id):
+    return f"db:pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Send this user's reads to the primary for a while after they write."""
+    cache.set(_pin_key(user_id), 1, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(user_id):
+    return cache.get(_pin_key(user_id)) is not None
+
+
+@contextmanager
+def replica_reads(user_id=None):
+    """Allow reads inside the block to go to a replica unless the user is pinned."""
+    enabled = bool(settings.DATABASE_REPLICAS) and not (
+        user_id is not None and is_pinned_to_primary(user_id)
+    )
+    token = _replica_reads_enabled.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads_enabled.reset(token)
+
+
+def _is_healthy(alias):
+    healthy, checked_at = _replica_health.get(alias, (True, 0.0))
+    now = time.monotonic()
+    if now - checked_at < settings.REPLICA_HEALTH_CHECK_INTERVAL:
+        return healthy
+    try:
+        connections[alias].ensure_connection()
+        healthy = True
+    except DatabaseError:
+        healthy = False
+    _replica_health[alias] = (healthy, now)
+    return healthy
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes always go to the primary. Reads go to a random healthy replica,
+    but only inside replica_reads(); everything else reads from the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads_enabled.get():
+            return PRIMARY_DB
+        healthy = [alias for alias in settings.DATABASE_REPLICAS if _is_healthy(alias)]
+        return random.choice(healthy) if healthy else PRIMARY_DB
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
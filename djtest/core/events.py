@@ -0,0 +1,211 @@
+# core/events.py
+
+import asyncio
+import json
+import logging
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+# Every note change is appended to a capped per-user Redis stream (for replay
+# after a reconnect) and published on a per-user channel (for live delivery).
+STREAM_PREFIX = "notes:stream:"
+CHANNEL_PREFIX = "notes:events:"
+
+logger = logging.getLogger(__name__)
+
+# Last-Event-ID comes from the client, so it is checked against the stream id
+# format before it reaches Redis; anything else gets a reset
+EVENT_ID_RE = re.compile(r"[0-9]+(-[0-9]+)?")
+
+
+def _redis():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+def _async_redis():
+    import redis.asyncio
+
+    return redis.asyncio.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+def _stream_id(event_id):
+    # Redis stream ids look like "<ms>-<seq>"; compare them numerically
+    ms, _, seq = event_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def _send_note_event(user_id, event_type, data):
+    client = _redis()
+    payload = json.dumps(data)
+    event_id = client.xadd(
+        f"{STREAM_PREFIX}{user_id}",
+        {"type": event_type, "data": payload},
+        maxlen=settings.NOTE_EVENTS_STREAM_MAXLEN,
+        approximate=True,
+    )
+    if isinstance(event_id, bytes):
+        event_id = event_id.decode()
+    client.publish(
+        f"{CHANNEL_PREFIX}{user_id}",
+        json.dumps({"id": event_id, "type": event_type, "data": payload}),
+    )
+    return event_id
+
+
+def publish_note_event(user_id, event_type, data):
+    """
+    Push a note change to the user's connected clients once the write commits.
+
+    Best effort: the note is already saved by then, so a Redis failure is
+    logged rather than failing the request.
+    """
+    transaction.on_commit(lambda: _send_note_event(user_id, event_type, data), robust=True)
+
+
+class NoteEventHub:
+    """
+    Fans events from one Redis pattern subscription out to every connected
+    client in this process, so idle connections cost an asyncio.Queue each
+    rather than a Redis connection each.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._reader = None
+        self._subscribed = None
+        self._loop = None
+        self.client = None
+
+    def subscribe(self, user_id):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Redis connections and tasks belong to one event loop. The
+            # client's pool is shared by the reader and every replay, so a
+            # wave of reconnects doesn't open a pool per connection.
+            self._loop = loop
+            self._reader = None
+            self.client = _async_redis()
+        if self._reader is None or self._reader.done():
+            self._subscribed = asyncio.Event()
+            self._reader = loop.create_task(self._read(self._subscribed))
+        queue = asyncio.Queue(maxsize=settings.NOTE_EVENTS_QUEUE_SIZE)
+        self._subscribers[str(user_id)].add(queue)
+        return queue
+
+    async def wait_subscribed(self):
+        """Wait until the reader's Redis subscription is live (or has failed)."""
+        await self._subscribed.wait()
+
+    def unsubscribe(self, user_id, queue):
+        queues = self._subscribers.get(str(user_id))
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[str(user_id)]
+
+    def _drop(self, user_id, queue):
+        # Ends the connection's stream; the client reconnects with
+        # Last-Event-ID and catches up from the Redis stream.
+        self.unsubscribe(user_id, queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def _dispatch(self, user_id, event):
+        for queue in list(self._subscribers.get(user_id, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A client this far behind is dropped
+                self._drop(user_id, queue)
+
+    async def _read(self, subscribed):
+        pubsub = self.client.pubsub()
+        try:
+            await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+            subscribed.set()
+            async for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                user_id = message["channel"][len(CHANNEL_PREFIX):]
+                self._dispatch(user_id, json.loads(message["data"]))
+        except Exception:
+            # Nobody awaits this task, so report the failure here
+            logger.warning("Note event subscription lost; dropping connected clients", exc_info=True)
+        finally:
+            # Events published while the subscription is down never reach
+            # this process, so drop every client rather than leave them
+            # waiting; the next subscribe() starts a new reader.
+            if self._reader is asyncio.current_task():
+                self._reader = None
+            # Waiters then find their queue already closed
+            subscribed.set()
+            for user_id, queues in list(self._subscribers.items()):
+                for queue in list(queues):
+                    self._drop(user_id, queue)
+            await pubsub.aclose()
+
+
+hub = NoteEventHub()
+
+
+def _format(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {event['data']}\n\n"
+
+
+async def _replay(user_id, last_event_id):
+    """Return the events after last_event_id, or None if some were trimmed away."""
+    key = f"{STREAM_PREFIX}{user_id}"
+    oldest = await hub.client.xrange(key, count=1)
+    if oldest and _stream_id(oldest[0][0]) > _stream_id(last_event_id):
+        return None
+    entries = await hub.client.xrange(key, min=last_event_id)
+    return [
+        {"id": event_id, "type": fields["type"], "data": fields["data"]}
+        for event_id, fields in entries
+        if event_id != last_event_id
+    ]
+
+
+async def note_event_stream(user_id, last_event_id=None):
+    """Yield server-sent events for one user's note changes."""
+    # Subscribe before replaying so nothing published in between is lost;
+    # duplicates are skipped by comparing stream ids.
+    queue = hub.subscribe(user_id)
+    try:
+        await hub.wait_subscribed()
+        yield f"retry: {settings.NOTE_EVENTS_RETRY_MS}\n\n"
+        if last_event_id:
+            if EVENT_ID_RE.fullmatch(last_event_id):
+                missed = await _replay(user_id, last_event_id)
+            else:
+                missed = last_event_id = None
+            if missed is None:
+                # Too far behind to replay, or an unknown id; the client
+                # should refetch the list
+                yield "event: reset\ndata: {}\n\n"
+            else:
+                for event in missed:
+                    last_event_id = event["id"]
+                    yield _format(event)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.NOTE_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing idle connections
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                break
+            if last_event_id and _stream_id(event["id"]) <= _stream_id(last_event_id):
+                continue
+            last_event_id = event["id"]
+            yield _format(event)
+    finally:
+        hub.unsubscribe(user_id, queue)
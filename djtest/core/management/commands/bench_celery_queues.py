@@ -0,0 +1,94 @@
+# core/management/commands/bench_celery_queues.py
+
+import os
+import threading
+import time
+from contextlib import ExitStack
+
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from core import task_metrics
+
+ENV_OVERRIDES = ("CELERY_BROKER_URL", "CELERY_RESULT_BACKEND")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare light-task queue wait with one shared queue versus separate "
+        "light/bulk queues, using an in-memory broker and in-process workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--heavy", type=int, default=8, help="Heavy tasks per run.")
+        parser.add_argument("--light", type=int, default=40, help="Light tasks per run.")
+        parser.add_argument("--heavy-seconds", type=float, default=0.2)
+
+    def handle(self, *args, **options):
+        # A throwaway app so the benchmark never touches the real broker; the
+        # metrics signal handlers are global and record its tasks too.
+        app = Celery("bench", broker="memory://", set_as_current=False)
+        app.conf.update(
+            broker_transport_options={"polling_interval": 0.01},
+            task_ignore_result=True,
+        )
+        done = threading.Semaphore(0)
+
+        @app.task(name="bench.heavy")
+        def heavy(seconds):
+            time.sleep(seconds)
+            done.release()
+
+        @app.task(name="bench.light")
+        def light():
+            done.release()
+
+        # Celery prefers these environment variables (set by .env) over the
+        # app's own configuration
+        saved_env = {key: os.environ.pop(key) for key in ENV_OVERRIDES if key in os.environ}
+        try:
+            with override_settings(CELERY_TASK_METRICS_STORE="memory"):
+                task_metrics._store = None
+                results = {
+                    "shared queue": self._run(app, heavy, light, options, done, split=False),
+                    "light/bulk queues": self._run(app, heavy, light, options, done, split=True),
+                }
+        finally:
+            task_metrics._store = None
+            os.environ.update(saved_env)
+
+        self.stdout.write(
+            f"heavy={options['heavy']} x {options['heavy_seconds']}s, light={options['light']}"
+        )
+        for name, (p50, p95, mean) in results.items():
+            self.stdout.write(
+                f"{name:18} light queue wait: p50<={p50}s p95<={p95}s mean={mean * 1000:.1f} ms"
+            )
+
+    def _run(self, app, heavy, light, options, done, split):
+        task_metrics.get_store().reset()
+        heavy_queue, light_queue = ("bench_bulk", "bench_light") if split else ("bench_shared",) * 2
+        with ExitStack() as stack:
+            for queue in sorted({heavy_queue, light_queue}):
+                # The solo pool: kombu's memory transport is very slow to
+                # feed the threads pool, which would swamp the measurement
+                stack.enter_context(start_worker(
+                    app, pool="solo", concurrency=1, queues=[queue],
+                    perform_ping_check=False, shutdown_timeout=30,
+                ))
+            # Heavy tasks arrive first, as when the archiver kicks off a run
+            for _ in range(options["heavy"]):
+                heavy.apply_async((options["heavy_seconds"],), queue=heavy_queue)
+            for _ in range(options["light"]):
+                light.apply_async(queue=light_queue)
+            for _ in range(options["heavy"] + options["light"]):
+                done.acquire(timeout=60)
+
+        hist = task_metrics.get_task_metrics()[(f"{light_queue}:bench.light", "queue_wait")]
+        return (
+            task_metrics.quantile(hist, 0.5),
+            task_metrics.quantile(hist, 0.95),
+            hist["sum"] / hist["count"],
+        )
@@ -0,0 +1,63 @@
+# core/management/commands/bench_note_revisions.py
+
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import CustomUser, Note
+from core.revisions import reconstruct, record_revision
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Measure revision storage per edit and reconstruction latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--edits", type=int, default=200)
+        parser.add_argument("--lines", type=int, default=200)
+
+    def handle(self, *args, **options):
+        edits, lines = options["edits"], options["lines"]
+        rng = random.Random(0)
+        doc = [f"line {i}: " + "lorem ipsum dolor sit amet " * 3 for i in range(lines)]
+
+        try:
+            # Everything is created inside a transaction that is rolled back
+            with transaction.atomic():
+                user = CustomUser.objects.create(username="bench-revisions")
+                # Like the API, version 1 is only stored on the first edit
+                note = Note.objects.create(notewriter=user, content="\n".join(doc))
+                full_copy_bytes = len(note.content.encode())
+                for _ in range(edits):
+                    previous = note.content
+                    # A typical small edit: rewrite one line and insert another
+                    doc[rng.randrange(len(doc))] = f"edited {rng.random()}"
+                    doc.insert(rng.randrange(len(doc)), f"inserted {rng.random()}")
+                    note.content = "\n".join(doc)
+                    note.save()
+                    full_copy_bytes += len(note.content.encode())
+                    record_revision(note, previous_content=previous)
+
+                stored_bytes = sum(len(data) for data in note.revisions.values_list("data", flat=True))
+                versions = edits + 1
+                timings = []
+                for version in range(1, versions + 1):
+                    start = time.perf_counter()
+                    reconstruct(note, version)
+                    timings.append(time.perf_counter() - start)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        timings.sort()
+        self.stdout.write(f"edits={edits} lines={lines} snapshot_interval={settings.NOTE_REVISION_SNAPSHOT_INTERVAL}")
+        self.stdout.write(f"full copies:   {full_copy_bytes / versions:10.0f} bytes/version")
+        self.stdout.write(f"delta storage: {stored_bytes / versions:10.0f} bytes/version")
+        self.stdout.write(f"reconstruct p50: {timings[len(timings) // 2] * 1000:8.2f} ms")
+        self.stdout.write(f"reconstruct max: {timings[-1] * 1000:8.2f} ms")
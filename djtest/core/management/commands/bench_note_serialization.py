@@ -0,0 +1,54 @@
+# core/management/commands/bench_note_serialization.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import CustomUser, Note
+from core.serializers import NoteSerializer, serialize_note_list
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare NoteSerializer(many=True) against the serialize_note_list fast path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        try:
+            # Everything is created inside a transaction that is rolled back
+            with transaction.atomic():
+                user = CustomUser.objects.create(username="bench-serialization")
+                Note.objects.bulk_create(
+                    Note(notewriter=user, content=f"benchmark note {i} " * 8) for i in range(rows)
+                )
+                queryset = Note.objects.filter(notewriter=user).order_by("-updated_at")
+                if serialize_note_list(queryset) != NoteSerializer(queryset, many=True).data:
+                    self.stderr.write("Fast path output differs from NoteSerializer")
+
+                slow = self._best(lambda: NoteSerializer(queryset.select_related("notewriter"), many=True).data, repeat)
+                fast = self._best(lambda: serialize_note_list(queryset), repeat)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        self.stdout.write(f"rows={rows} repeat={repeat} (best of)")
+        self.stdout.write(f"NoteSerializer:      {slow * 1000:8.2f} ms")
+        self.stdout.write(f"serialize_note_list: {fast * 1000:8.2f} ms")
+        self.stdout.write(f"speedup:             {slow / fast:8.2f}x")
+
+    @staticmethod
+    def _best(fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,25 @@
+# core/management/commands/reconcile_note_stats.py
+
+from django.core.management.base import BaseCommand
+
+from core.models import CustomUser
+from core.stats import reconcile_note_stats
+
+
+class Command(BaseCommand):
+    help = "Recount every user's notes and repair drifted NoteStats counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users",
+                            help="Only reconcile this user id (repeatable).")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Report drifted users without fixing them.")
+
+    def handle(self, *args, **options):
+        user_ids = options["users"]
+        checked = len(user_ids) if user_ids else CustomUser.objects.count()
+        drifted = reconcile_note_stats(user_ids, dry_run=options["dry_run"])
+        verb = "would repair" if options["dry_run"] else "repaired"
+        self.stdout.write(f"Checked {checked} users, {verb} {len(drifted)}.")
+        for user_id in drifted:
+            self.stdout.write(f"  user {user_id}")
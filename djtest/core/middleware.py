@@ -0,0 +1,172 @@
+# core/middleware.py
+
+import gzip
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # optional: pip install Brotli
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits=31 writes a gzip header/trailer instead of a raw zlib stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        # Sync-flush each chunk so streamed events reach the client promptly
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def _gzip_bytes(data, level):
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+# Server-side preference order, used to break ties between equal q-values.
+CODECS = {}
+if brotli is not None:
+    CODECS["br"] = (lambda data, level: brotli.compress(data, quality=level), _BrotliStream)
+if zstandard is not None:
+    CODECS["zstd"] = (lambda data, level: zstandard.ZstdCompressor(level=level).compress(data), _ZstdStream)
+CODECS["gzip"] = (_gzip_bytes, _GzipStream)
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick the best available encoding from an Accept-Encoding header, or None."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        accepted[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in CODECS:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _is_compressible(content_type):
+    content_type = content_type.split(";")[0].strip().lower()
+    return content_type in settings.COMPRESSION_CONTENT_TYPES
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress responses with brotli, zstd or gzip, whichever the client prefers.
+
+    Only COMPRESSION_CONTENT_TYPES are compressed, and responses smaller
+    than COMPRESSION_MIN_SIZE are left alone. Streaming responses are
+    compressed chunk by chunk. A view can set ``response.compressed_cache_key``
+    to keep the compressed body in the cache so later hits under the same
+    key skip recompression.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding") or isinstance(response, FileResponse):
+            return response
+        if not _is_compressible(response.get("Content-Type", "")):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+        compress_bytes, stream_class = CODECS[encoding]
+        level = settings.COMPRESSION_LEVELS[encoding]
+
+        if response.streaming:
+            self._compress_stream(response, stream_class(level))
+            del response.headers["Content-Length"]
+        else:
+            cache_key = getattr(response, "compressed_cache_key", None)
+            if cache_key is not None and settings.COMPRESSION_CACHE_TTL:
+                # The checksum is far cheaper than compressing and guards
+                # against serving a body rendered from different data.
+                cache_key = f"{cache_key}:{encoding}:{level}:{zlib.crc32(response.content)}"
+                compressed = cache.get(cache_key)
+                if compressed is None:
+                    compressed = compress_bytes(response.content, level)
+                    cache.set(cache_key, compressed, settings.COMPRESSION_CACHE_TTL)
+            else:
+                compressed = compress_bytes(response.content, level)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # A strong ETag no longer matches the encoded bytes (RFC 9110 8.8.1)
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    @staticmethod
+    def _compress_stream(response, stream):
+        original = response.streaming_content
+
+        if response.is_async:
+            async def compressed():
+                async for chunk in original:
+                    data = stream.compress(chunk)
+                    if data:
+                        yield data
+                yield stream.finish()
+        else:
+            def compressed():
+                for chunk in original:
+                    data = stream.compress(chunk)
+                    if data:
+                        yield data
+                yield stream.finish()
+
+        response.streaming_content = compressed()
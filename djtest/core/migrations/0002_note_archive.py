@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedNote",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("compressed_content", models.BinaryField()),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                fields=["updated_at"], name="core_note_updated_f9f74a_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivednote",
+            name="notewriter",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="archived_notes",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archivednote",
+            index=models.Index(
+                fields=["notewriter", "-updated_at"],
+                name="core_archiv_notewri_f3c85e_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_note_stats(apps, schema_editor):
+    Note = apps.get_model("core", "Note")
+    NoteStats = apps.get_model("core", "NoteStats")
+    stats = {}
+    rows = Note.objects.filter(notewriter__isnull=False).values_list(
+        "notewriter_id", "content", "updated_at"
+    )
+    for user_id, content, updated_at in rows.iterator(chunk_size=2000):
+        count, size, last = stats.get(user_id, (0, 0, None))
+        stats[user_id] = (
+            count + 1,
+            size + len(content.encode()),
+            max(last, updated_at) if last else updated_at,
+        )
+    NoteStats.objects.bulk_create(
+        NoteStats(
+            user_id=user_id, note_count=count, content_bytes=size, last_updated_at=last
+        )
+        for user_id, (count, size, last) in stats.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_note_revision"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NoteStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="note_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("note_count", models.PositiveIntegerField(default=0)),
+                ("content_bytes", models.PositiveBigIntegerField(default=0)),
+                ("last_updated_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(populate_note_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_note_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="noterevision",
+            name="archived_note",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="revisions",
+                to="core.archivednote",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="noterevision",
+            name="note",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="revisions",
+                to="core.note",
+            ),
+        ),
+    ]
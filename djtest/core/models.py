@@ -1,3 +1,5 @@
+import zlib
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
@@ -27,7 +29,88 @@ class Note(Timer):
         related_name="notes"
     )
     content = models.TextField()  
+
+    class Meta:
+        indexes = [
+            # Used by the archiver to find notes past the cutoff
+            models.Index(fields=["updated_at"]),
+        ]
     
     def __str__(self):
         
-        return f"{self.content[:20]} by {self.notewriter.username if self.notewriter else 'Anonymous'}"
\ No newline at end of file
+        return f"{self.content[:20]} by {self.notewriter.username if self.notewriter else 'Anonymous'}"
+
+class NoteStats(models.Model):
+    """
+    Per-user note counters, kept up to date in the same transaction as each
+    note write (see core/stats.py). `reconcile_note_stats` repairs drift.
+    """
+    user = models.OneToOneField(
+        CustomUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="note_stats"
+    )
+    note_count = models.PositiveIntegerField(default=0)
+    content_bytes = models.PositiveBigIntegerField(default=0)
+    last_updated_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.note_count} notes"
+
+class NoteRevision(models.Model):
+    """
+    One version of a note's content. Snapshots hold the full text; other
+    revisions hold a delta against the previous version (see core/revisions.py).
+    When the archiver moves a note, its revisions move to the ArchivedNote.
+    """
+    note = models.ForeignKey(
+        Note, on_delete=models.CASCADE, blank=True, null=True, related_name="revisions"
+    )
+    archived_note = models.ForeignKey(
+        "ArchivedNote", on_delete=models.CASCADE, blank=True, null=True, related_name="revisions"
+    )
+    version = models.PositiveIntegerField()
+    is_snapshot = models.BooleanField(default=False)
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["note", "version"], name="unique_note_version"),
+        ]
+
+    def __str__(self):
+        return f"Note {self.note_id or self.archived_note_id} v{self.version}"
+
+class ArchivedNote(models.Model):
+    """A note moved out of core_note by the archiver, with zlib-compressed content."""
+    # Same id the note had while it was live
+    id = models.BigIntegerField(primary_key=True)
+    notewriter = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="archived_notes"
+    )
+    compressed_content = models.BinaryField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["notewriter", "-updated_at"]),
+        ]
+
+    @property
+    def content(self):
+        return zlib.decompress(self.compressed_content).decode()
+
+    @staticmethod
+    def compress(content):
+        return zlib.compress(content.encode())
+
+    def __str__(self):
+        return f"Archived note {self.id}"
\ No newline at end of file
@@ -0,0 +1,7 @@
+# core/pagination.py
+
+from rest_framework.pagination import LimitOffsetPagination
+
+class ArchivePagination(LimitOffsetPagination):
+    default_limit = 50  # used when the request has no ?limit=
+    max_limit = 200
@@ -0,0 +1,110 @@
+# core/revisions.py
+
+import difflib
+import json
+import zlib
+
+from django.conf import settings
+from django.db.models import Max
+
+from .models import NoteRevision
+
+# A delta is a JSON list of line operations applied to the previous version:
+#   n > 0      copy the next n lines
+#   n < 0      skip the next -n lines
+#   [lines]    insert these lines
+
+
+def make_delta(old, new):
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(new_lines[j1:j2])
+    return ops
+
+
+def apply_delta(old, ops):
+    old_lines = old.splitlines(keepends=True)
+    out = []
+    position = 0
+    for op in ops:
+        if isinstance(op, list):
+            out.extend(op)
+        elif op > 0:
+            out.extend(old_lines[position:position + op])
+            position += op
+        else:
+            position -= op
+    return "".join(out)
+
+
+def _pack(value):
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode())
+
+
+def _unpack(data):
+    return json.loads(zlib.decompress(data))
+
+
+def record_revision(note, previous_content=None):
+    """
+    Store note.content as the note's next version.
+
+    previous_content is the text of the latest version. Notes get no revision
+    when created, so on their first edit it is stored as version 1 first.
+    """
+    latest = note.revisions.aggregate(latest=Max("version"))["latest"]
+    if latest is None and previous_content is not None:
+        NoteRevision.objects.create(note=note, version=1, is_snapshot=True, data=_pack(previous_content))
+        latest = 1
+    version = (latest or 0) + 1
+
+    if version == 1 or (version - 1) % settings.NOTE_REVISION_SNAPSHOT_INTERVAL == 0:
+        data, is_snapshot = _pack(note.content), True
+    else:
+        data, is_snapshot = _pack(make_delta(previous_content, note.content)), False
+        # A near-total rewrite diffs worse than a copy; store a snapshot instead
+        snapshot = _pack(note.content)
+        if len(snapshot) <= len(data):
+            data, is_snapshot = snapshot, True
+    return NoteRevision.objects.create(note=note, version=version, is_snapshot=is_snapshot, data=data)
+
+
+def reconstruct(note, version):
+    """
+    Rebuild the content of one version, or return None if it doesn't exist.
+
+    Reads the nearest snapshot at or below the version and replays at most
+    NOTE_REVISION_SNAPSHOT_INTERVAL - 1 deltas on top of it.
+    """
+    snapshot = (
+        note.revisions.filter(version__lte=version, is_snapshot=True)
+        .order_by("-version")
+        .values_list("version", "data")
+        .first()
+    )
+    if snapshot is None:
+        # A note that was never edited has one version: its live content
+        if version == 1 and not note.revisions.exists():
+            return note.content
+        return None
+    base_version, data = snapshot
+    deltas = list(
+        note.revisions.filter(version__gt=base_version, version__lte=version)
+        .order_by("version")
+        .values_list("version", "data")
+    )
+    if len(deltas) != version - base_version:
+        return None
+    content = _unpack(data)
+    for _, delta in deltas:
+        content = apply_delta(content, _unpack(delta))
+    return content
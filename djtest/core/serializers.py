@@ -61,4 +61,55 @@ class NoteSerializer(serializers.ModelSerializer):
     def get_notewriter(self, obj):
         if obj.notewriter:
             return {'id': obj.notewriter.id, 'username': obj.notewriter.username, 'role': obj.notewriter.role}
-        return None
\ No newline at end of file
+        return None
+
+class ArchivedNoteSerializer(serializers.ModelSerializer):
+    # Decompressed per serialized row, so only the requested page pays for it
+    content = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = ArchivedNote
+        fields = ['id', 'content', 'created_at', 'updated_at', 'archived_at']
+        read_only_fields = fields
+
+
+# Columns pulled by serialize_note_list, in output order.
+NOTE_LIST_COLUMNS = (
+    'id',
+    'notewriter_id',
+    'notewriter__username',
+    'notewriter__role',
+    'content',
+    'created_at',
+    'updated_at',
+)
+
+
+def serialize_note_list(queryset):
+    """
+    Read-only fast path for NoteSerializer(queryset, many=True).data.
+
+    Reads flat tuples with values_list() (one JOIN, no Note/CustomUser
+    instances) and formats the timestamps with NoteSerializer's own
+    DateTimeField instances, built once per call instead of per row.
+    """
+    fields = NoteSerializer().fields
+    created_at = fields['created_at'].to_representation
+    updated_at = fields['updated_at'].to_representation
+
+    data = []
+    append = data.append
+    for pk, writer_id, username, role, content, created, updated in queryset.values_list(
+        *NOTE_LIST_COLUMNS
+    ):
+        append({
+            'id': pk,
+            'notewriter': (
+                {'id': writer_id, 'username': username, 'role': role}
+                if writer_id is not None else None
+            ),
+            'content': content,
+            'created_at': created_at(created),
+            'updated_at': updated_at(updated),
+        })
+    return data
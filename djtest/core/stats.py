@@ -0,0 +1,80 @@
+# core/stats.py
+
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import CustomUser, Note, NoteStats
+
+
+def content_size(content):
+    return len(content.encode())
+
+
+def record_note_change(user_id, count_delta=0, bytes_delta=0, touched=True):
+    """
+    Apply a note write to the user's counters. Call it inside the write's
+    transaction so the counters commit or roll back with the note.
+    """
+    if user_id is None:
+        return
+    NoteStats.objects.get_or_create(user_id=user_id)
+    # Clamp at zero so drifted counters can't make a write fail; the
+    # reconcile command restores exact values.
+    changes = {
+        "note_count": Greatest(F("note_count") + count_delta, 0),
+        "content_bytes": Greatest(F("content_bytes") + bytes_delta, 0),
+    }
+    if touched:
+        changes["last_updated_at"] = timezone.now()
+    NoteStats.objects.filter(user_id=user_id).update(**changes)
+
+
+def compute_note_stats(user_ids=None):
+    """
+    Recount live notes: {user_id: (note_count, content_bytes, last_updated_at)}.
+    Only the given users' notes are read when user_ids is passed.
+    """
+    stats = {}
+    notes = Note.objects.filter(notewriter__isnull=False)
+    if user_ids is not None:
+        notes = notes.filter(notewriter_id__in=user_ids)
+    rows = notes.values_list("notewriter_id", "content", "updated_at").iterator(chunk_size=2000)
+    for user_id, content, updated_at in rows:
+        count, size, last = stats.get(user_id, (0, 0, None))
+        stats[user_id] = (count + 1, size + content_size(content), max(last, updated_at) if last else updated_at)
+    return stats
+
+
+def reconcile_note_stats(user_ids=None, dry_run=False):
+    """
+    Rewrite the counters of the given users (default: everyone) from a
+    recount and return the ids whose counters had drifted. last_updated_at
+    only ever moves forward, since deletes count as activity but leave no
+    row to recount.
+    """
+    actual = compute_note_stats(user_ids)
+    stored = NoteStats.objects.all()
+    if user_ids is None:
+        user_ids = CustomUser.objects.values_list("id", flat=True)
+    else:
+        stored = stored.filter(user_id__in=user_ids)
+    stored = {row.user_id: row for row in stored}
+    drifted = []
+    for user_id in user_ids:
+        count, size, last = actual.get(user_id, (0, 0, None))
+        row = stored.get(user_id)
+        if row is not None and (row.note_count, row.content_bytes) == (count, size) and (
+            last is None or (row.last_updated_at and row.last_updated_at >= last)
+        ):
+            continue
+        drifted.append(user_id)
+        if dry_run:
+            continue
+        if row is not None and row.last_updated_at and (last is None or row.last_updated_at > last):
+            last = row.last_updated_at
+        NoteStats.objects.update_or_create(
+            user_id=user_id,
+            defaults={"note_count": count, "content_bytes": size, "last_updated_at": last},
+        )
+    return drifted
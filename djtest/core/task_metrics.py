@@ -0,0 +1,138 @@
+# core/task_metrics.py
+
+import bisect
+import threading
+import time
+from collections import defaultdict
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from django.conf import settings
+
+# Upper bounds in seconds, Prometheus style; the last bucket catches the rest.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+KINDS = ("queue_wait", "duration")
+REDIS_PREFIX = "celery:metrics:"
+
+
+def _bucket_label(index):
+    bound = BUCKETS[index]
+    return "+Inf" if bound == float("inf") else str(bound)
+
+
+class MemoryStore:
+    """Histograms for this process only; used by tests and the local benchmark."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def observe(self, series, values):
+        with self._lock:
+            for kind, value in values.items():
+                hist = self._data.setdefault(
+                    (series, kind), {"buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0}
+                )
+                hist["buckets"][bisect.bisect_left(BUCKETS, value)] += 1
+                hist["count"] += 1
+                hist["sum"] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {key: {**hist, "buckets": list(hist["buckets"])} for key, hist in self._data.items()}
+
+    def reset(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisStore:
+    """Histograms shared by every worker process, one Redis hash per series and kind."""
+
+    def _client(self):
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+
+    def observe(self, series, values):
+        pipe = self._client().pipeline(transaction=False)
+        for kind, value in values.items():
+            key = f"{REDIS_PREFIX}{series}:{kind}"
+            pipe.hincrby(key, _bucket_label(bisect.bisect_left(BUCKETS, value)), 1)
+            pipe.hincrby(key, "count", 1)
+            pipe.hincrbyfloat(key, "sum", value)
+        pipe.execute()
+
+    def snapshot(self):
+        client = self._client()
+        data = {}
+        for key in client.scan_iter(f"{REDIS_PREFIX}*"):
+            key = key.decode() if isinstance(key, bytes) else key
+            series, _, kind = key[len(REDIS_PREFIX):].rpartition(":")
+            raw = {k.decode(): v.decode() for k, v in client.hgetall(key).items()}
+            data[(series, kind)] = {
+                "buckets": [int(raw.get(_bucket_label(i), 0)) for i in range(len(BUCKETS))],
+                "count": int(raw.get("count", 0)),
+                "sum": float(raw.get("sum", 0)),
+            }
+        return data
+
+    def reset(self):
+        client = self._client()
+        for key in client.scan_iter(f"{REDIS_PREFIX}*"):
+            client.delete(key)
+
+
+_stores = {"memory": MemoryStore, "redis": RedisStore}
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = _stores[settings.CELERY_TASK_METRICS_STORE]()
+    return _store
+
+
+def quantile(hist, q):
+    """Upper bound of the bucket holding the q-th observation (0 < q <= 1)."""
+    target = q * hist["count"]
+    seen = 0
+    for bound, count in zip(BUCKETS, hist["buckets"]):
+        seen += count
+        if count and seen >= target:
+            return bound
+    return None
+
+
+def get_task_metrics():
+    """{(queue:task, kind): {"buckets", "count", "sum"}} across all observations so far."""
+    return get_store().snapshot()
+
+
+# Start times of tasks running in this process, keyed by task id
+_started = {}
+
+
+@before_task_publish.connect
+def _stamp_publish_time(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault("published_at", time.time())
+
+
+@task_prerun.connect
+def _record_start(task_id=None, task=None, **kwargs):
+    _started[task_id] = (time.time(), time.monotonic())
+
+
+@task_postrun.connect
+def _record_finish(task_id=None, task=None, **kwargs):
+    started = _started.pop(task_id, None)
+    if started is None:
+        return
+    started_at, started_monotonic = started
+    values = {"duration": time.monotonic() - started_monotonic}
+    published_at = getattr(task.request, "published_at", None)
+    if published_at is not None:
+        values["queue_wait"] = max(0.0, started_at - published_at)
+    queue = (task.request.delivery_info or {}).get("routing_key") or "unknown"
+    get_store().observe(f"{queue}:{task.name}", values)
@@ -1,12 +1,20 @@
 # core/tasks.py
 
 from celery import shared_task
+# Configure the project's Celery app before any task is called; see djtest/__init__.py
+import djtest.celery  # noqa: F401
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
+from datetime import timedelta
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
-@shared_task
+@shared_task(ignore_result=False)
 def add(x, y):
     """
     Simple example task: returns x + y.
@@ -29,3 +37,98 @@ def mark_note_as_old(note_id):
         return f"Marked note {note_id}"
     except Note.DoesNotExist:
         return f"Note {note_id} not found"
+
+
+ARCHIVE_PROGRESS_KEY = "notes:archive:progress"
+
+
+def get_archive_progress():
+    """Counters from the archiver's runs: totals plus the latest run's numbers."""
+    return cache.get(ARCHIVE_PROGRESS_KEY, {
+        "archived_total": 0,
+        "runs": 0,
+        "last_run_archived": 0,
+        "last_run_batches": 0,
+        "last_run_seconds": 0.0,
+        "last_run_at": None,
+        "cutoff": None,
+    })
+
+
+def _archive_batch(cutoff, batch_size):
+    """Move one batch of notes older than cutoff into ArchivedNote; return the writers touched."""
+    from .models import ArchivedNote, Note, NoteRevision
+    from .stats import content_size, record_note_change
+
+    with transaction.atomic():
+        notes = list(
+            Note.objects.select_for_update(skip_locked=True)
+            .filter(updated_at__lt=cutoff)
+            .order_by("id")
+            .values_list("id", "notewriter_id", "content", "created_at", "updated_at")[:batch_size]
+        )
+        if not notes:
+            return None
+        ArchivedNote.objects.bulk_create([
+            ArchivedNote(
+                id=pk,
+                notewriter_id=writer_id,
+                compressed_content=ArchivedNote.compress(content),
+                created_at=created_at,
+                updated_at=updated_at,
+            )
+            for pk, writer_id, content, created_at, updated_at in notes
+        ])
+        ids = [note[0] for note in notes]
+        # Keep the history: the archived note has the same id as the live one
+        NoteRevision.objects.filter(note_id__in=ids).update(archived_note_id=F("note_id"), note=None)
+        Note.objects.filter(id__in=ids).delete()
+        removed = {}
+        for _, writer_id, content, _, _ in notes:
+            count, size = removed.get(writer_id, (0, 0))
+            removed[writer_id] = (count + 1, size + content_size(content))
+        for writer_id, (count, size) in removed.items():
+            record_note_change(writer_id, count_delta=-count, bytes_delta=-size, touched=False)
+    return len(notes), {note[1] for note in notes if note[1] is not None}
+
+
+@shared_task(ignore_result=True)
+def archive_old_notes():
+    """
+    Move notes untouched for NOTE_ARCHIVE_AFTER_DAYS into the archive table.
+
+    Runs at most NOTE_ARCHIVE_MAX_BATCHES transactions of
+    NOTE_ARCHIVE_BATCH_SIZE notes, so a large backlog is drained over
+    several beat runs instead of one long-locking job.
+    """
+    from .caching import invalidate_user_notes
+
+    started = time.monotonic()
+    cutoff = timezone.now() - timedelta(days=settings.NOTE_ARCHIVE_AFTER_DAYS)
+    archived = batches = 0
+    writers = set()
+    while batches < settings.NOTE_ARCHIVE_MAX_BATCHES:
+        result = _archive_batch(cutoff, settings.NOTE_ARCHIVE_BATCH_SIZE)
+        if result is None:
+            break
+        count, batch_writers = result
+        archived += count
+        batches += 1
+        writers |= batch_writers
+        logger.info(f"Archived batch {batches}: {count} notes ({archived} this run)")
+
+    for writer_id in writers:
+        invalidate_user_notes(writer_id)
+
+    progress = get_archive_progress()
+    progress.update(
+        archived_total=progress["archived_total"] + archived,
+        runs=progress["runs"] + 1,
+        last_run_archived=archived,
+        last_run_batches=batches,
+        last_run_seconds=round(time.monotonic() - started, 3),
+        last_run_at=timezone.now().isoformat(),
+        cutoff=cutoff.isoformat(),
+    )
+    cache.set(ARCHIVE_PROGRESS_KEY, progress, None)
+    return archived
@@ -1,3 +1,697 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import click
+import fakeredis
+import redis
+from click.core import ParameterSource
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template.loader import get_template
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from startup_profile import measure_startup, run_target
+
+from .caching import _release_lock, get_or_compute, invalidate_user_notes
+from .db_router import PrimaryReplicaRouter, pin_to_primary, replica_reads
+from .events import _send_note_event, hub, note_event_stream
+from .middleware import CODECS, CompressionMiddleware, negotiate_encoding
+from .models import ArchivedNote, Note, NoteStats
+from .serializers import NoteSerializer, serialize_note_list
+from .stats import compute_note_stats
+from .revisions import apply_delta, make_delta, reconstruct, record_revision
+from .tasks import archive_old_notes, get_archive_progress
+from . import task_metrics
+from .views import _cached_app_shell
+
+User = get_user_model()
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NoteListSerializationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="s3cret-pass", role="girl")
+        for i in range(5):
+            Note.objects.create(notewriter=self.user, content=f"note {i}")
+        Note.objects.create(notewriter=None, content="orphan")
+
+    def test_fast_path_matches_note_serializer(self):
+        queryset = Note.objects.order_by("-updated_at")
+        expected = NoteSerializer(queryset, many=True).data
+        self.assertEqual(serialize_note_list(queryset), expected)
+
+    def test_fast_path_uses_single_query(self):
+        with self.assertNumQueries(1):
+            serialize_note_list(Note.objects.all())
+
+    def test_list_endpoint_returns_serializer_output(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get("/api/notes/")
+        self.assertEqual(response.status_code, 200)
+        expected = NoteSerializer(
+            Note.objects.filter(notewriter=self.user).order_by("-updated_at"), many=True
+        ).data
+        self.assertEqual(response.json(), expected)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NoteCacheStampedeTests(TransactionTestCase):
+    BURST = 200
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="bob", password="s3cret-pass")
+        Note.objects.bulk_create(Note(notewriter=self.user, content=f"note {i}") for i in range(20))
+
+    def _burst(self):
+        """Fire BURST simultaneous list requests and count queries on core_note."""
+        barrier = threading.Barrier(self.BURST)
+        lock = threading.Lock()
+        note_queries = []
+        statuses = []
+
+        def count_note_queries(execute, sql, params, many, context):
+            if "core_note" in sql:
+                with lock:
+                    note_queries.append(sql)
+            return execute(sql, params, many, context)
+
+        def worker():
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                with connection.execute_wrapper(count_note_queries):
+                    barrier.wait()
+                    response = client.get("/api/notes/")
+                with lock:
+                    statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.BURST)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(statuses, [200] * self.BURST)
+        return note_queries
+
+    def test_cold_cache_burst_hits_db_once(self):
+        self.assertEqual(len(self._burst()), 1)
+
+    def test_burst_after_invalidation_hits_db_once(self):
+        self._burst()
+        invalidate_user_notes(self.user.id)
+        self.assertEqual(len(self._burst()), 1)
+
+    def test_expired_entry_is_served_stale_while_one_request_rebuilds(self):
+        self._burst()
+        with mock.patch("core.caching.time.time", return_value=time.time() + 60 * 60):
+            self.assertEqual(len(self._burst()), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GetOrComputeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_fresh_entry_is_not_recomputed(self):
+        compute = mock.Mock(return_value="v1")
+        get_or_compute("k", compute, ttl=60)
+        self.assertEqual(get_or_compute("k", compute, ttl=60), "v1")
+        compute.assert_called_once()
+
+    def test_entry_near_expiry_is_refreshed_early(self):
+        get_or_compute("k", lambda: "v1", ttl=60)
+        entry = cache.get("k")
+        # A slow rebuild one second before expiry is almost certainly refreshed
+        entry.update(delta=30.0, expires=time.time() + 1)
+        cache.set("k", entry)
+        with mock.patch("core.caching.random.random", return_value=0.5):
+            self.assertEqual(get_or_compute("k", lambda: "v2", ttl=60), "v2")
+
+
+@override_settings(CACHES={
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": "redis://fake/0",
+        "OPTIONS": {"CONNECTION_POOL_KWARGS": {"connection_class": fakeredis.FakeConnection}},
+    },
+})
+class RedisLockReleaseTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_lock_is_released_only_by_its_holder(self):
+        cache.add("k:lock", "theirs", 10)
+        _release_lock("k:lock", "mine")
+        self.assertEqual(cache.get("k:lock"), "theirs")
+        _release_lock("k:lock", "theirs")
+        self.assertIsNone(cache.get("k:lock"))
+
+    def test_rebuild_releases_its_lock(self):
+        self.assertEqual(get_or_compute("k", lambda: "v1", ttl=60), "v1")
+        self.assertIsNone(cache.get("k:lock"))
+
+
+@override_settings(CACHES=LOCMEM_CACHES, DATABASE_REPLICAS=["replica1", "replica2"])
+class PrimaryReplicaRouterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        patcher = mock.patch("core.db_router._is_healthy", return_value=True)
+        self.is_healthy = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_outside_replica_block_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Note), "default")
+
+    def test_reads_inside_replica_block_use_a_replica(self):
+        with replica_reads(user_id=1):
+            self.assertIn(self.router.db_for_read(Note), ["replica1", "replica2"])
+            self.assertEqual(self.router.db_for_write(Note), "default")
+
+    def test_user_is_pinned_to_primary_after_a_write(self):
+        pin_to_primary(1)
+        with replica_reads(user_id=1):
+            self.assertEqual(self.router.db_for_read(Note), "default")
+        with replica_reads(user_id=2):
+            self.assertNotEqual(self.router.db_for_read(Note), "default")
+
+    def test_unhealthy_replicas_fall_back(self):
+        self.is_healthy.side_effect = lambda alias: alias == "replica2"
+        with replica_reads(user_id=1):
+            self.assertEqual(self.router.db_for_read(Note), "replica2")
+        self.is_healthy.side_effect = None
+        self.is_healthy.return_value = False
+        with replica_reads(user_id=1):
+            self.assertEqual(self.router.db_for_read(Note), "default")
+
+    def test_cache_fills_read_from_the_primary(self):
+        user = User.objects.create_user(username="hank", password="s3cret-pass")
+        note = Note.objects.create(notewriter=user, content="hello")
+        client = APIClient()
+        client.force_authenticate(user)
+        route = PrimaryReplicaRouter.db_for_read
+        chosen = []
+
+        def spy(router, model, **hints):
+            chosen.append(route(router, model, **hints))
+            return "default"  # the test database has no real replicas
+
+        with mock.patch.object(PrimaryReplicaRouter, "db_for_read", spy):
+            client.get("/api/notes/")
+            client.get(f"/api/notes/{note.id}/")
+            self.assertEqual(set(chosen), {"default"})
+            client.get("/api/notes/archived/")
+        self.assertIn(chosen[-1], ["replica1", "replica2"])
+
+
+SHELL_TEMPLATES = [{
+    "BACKEND": "django.template.backends.django.DjangoTemplates",
+    "OPTIONS": {
+        "loaders": [("django.template.loaders.locmem.Loader", {"index.html": "<div id=root></div>"})],
+    },
+}]
+
+
+@override_settings(TEMPLATES=SHELL_TEMPLATES)
+class AppShellTests(TestCase):
+    def setUp(self):
+        _cached_app_shell.cache_clear()
+        self.addCleanup(_cached_app_shell.cache_clear)
+
+    def test_shell_is_rendered_once_and_revalidated_by_etag(self):
+        with mock.patch("core.views.get_template", wraps=get_template) as loader:
+            first = self.client.get("/")
+            second = self.client.get("/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.content, b"<div id=root></div>")
+        self.assertEqual(first["Cache-Control"], "no-cache")
+        self.assertEqual(second.status_code, 304)
+        loader.assert_called_once()
+
+    @override_settings(DEBUG=True)
+    def test_shell_is_rendered_once_per_request_while_debugging(self):
+        with mock.patch("core.views.get_template", wraps=get_template) as loader:
+            self.client.get("/")
+            self.client.get("/")
+        self.assertEqual(loader.call_count, 2)
+
+
+class PrecompressedStaticTests(TestCase):
+    def test_collectstatic_precompresses_and_serves_hashed_files_as_immutable(self):
+        with tempfile.TemporaryDirectory() as static_root, override_settings(STATIC_ROOT=static_root):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            hashed = next(Path(static_root, "admin", "css").glob("base.*.css"))
+            self.assertTrue(hashed.with_name(hashed.name + ".gz").exists())
+            self.assertTrue(hashed.with_name(hashed.name + ".br").exists())
+
+            url = f"/static/admin/css/{hashed.name}"
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING="br, gzip")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Encoding"], "br")
+            self.assertIn("immutable", response["Cache-Control"])
+
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(not_modified.status_code, 304)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, COMPRESSION_MIN_SIZE=100)
+class CompressionMiddlewareTests(TestCase):
+    body = b'{"content": "' + b"note " * 200 + b'"}'
+
+    def setUp(self):
+        cache.clear()
+
+    def _process(self, response, accept_encoding="gzip"):
+        request = RequestFactory().get("/api/notes/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def _json(self, body=None):
+        return HttpResponse(body or self.body, content_type="application/json")
+
+    def test_negotiation_honours_quality_then_server_preference(self):
+        self.assertEqual(negotiate_encoding("gzip, deflate, br"), "br")
+        self.assertEqual(negotiate_encoding("br;q=0.5, gzip"), "gzip")
+        self.assertEqual(negotiate_encoding("zstd, gzip;q=0.9"), "zstd")
+        self.assertIsNone(negotiate_encoding("identity"))
+        self.assertIsNone(negotiate_encoding("gzip;q=0"))
+
+    def test_large_json_is_compressed(self):
+        response = self._process(self._json())
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_small_response_is_left_alone(self):
+        response = self._process(self._json(b'{"id": 1}'))
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_html_is_left_alone(self):
+        response = self._process(HttpResponse(self.body, content_type="text/html; charset=utf-8"))
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_streaming_response_is_compressed_incrementally(self):
+        chunks = [b"data: %d\n\n" % i for i in range(50)]
+        response = self._process(StreamingHttpResponse(iter(chunks), content_type="text/event-stream"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), b"".join(chunks))
+
+    def test_cached_response_reuses_compressed_body(self):
+        compress = mock.Mock(side_effect=lambda data, level: gzip.compress(data, level))
+        with mock.patch.dict("core.middleware.CODECS", {"gzip": (compress, CODECS["gzip"][1])}):
+            for _ in range(3):
+                response = self._json()
+                response.compressed_cache_key = "notes:1:1:list"
+                compressed = self._process(response)
+        compress.assert_called_once()
+        self.assertEqual(gzip.decompress(compressed.content), self.body)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, NOTE_EVENTS_HEARTBEAT=0.05)
+class NoteEventStreamTests(TestCase):
+    def setUp(self):
+        server = fakeredis.FakeServer()
+        for target, client in [
+            ("core.events._redis", lambda: fakeredis.FakeRedis(server=server)),
+            ("core.events._async_redis", lambda: fakeredis.FakeAsyncRedis(server=server, decode_responses=True)),
+        ]:
+            patcher = mock.patch(target, client)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def _next_events(self, stream, count):
+        events = []
+        while len(events) < count:
+            chunk = await asyncio.wait_for(anext(stream), 2)
+            if chunk.startswith("id:") or chunk.startswith("event:"):
+                events.append(chunk)
+        return events
+
+    def test_reconnect_replays_events_after_last_event_id(self):
+        first = _send_note_event(1, "created", {"id": 1})
+        _send_note_event(1, "updated", {"id": 1})
+        _send_note_event(2, "created", {"id": 9})
+
+        async def scenario():
+            stream = note_event_stream(1, last_event_id=first)
+            try:
+                return await self._next_events(stream, 1)
+            finally:
+                await stream.aclose()
+
+        [event] = asyncio.run(scenario())
+        self.assertIn("event: updated", event)
+
+    def test_invalid_last_event_id_resets_the_client(self):
+        _send_note_event(1, "created", {"id": 1})
+
+        async def scenario():
+            stream = note_event_stream(1, last_event_id="garbage")
+            try:
+                return await self._next_events(stream, 1)
+            finally:
+                await stream.aclose()
+
+        [event] = asyncio.run(scenario())
+        self.assertTrue(event.startswith("event: reset"))
+
+    def test_live_events_are_pushed_to_subscribers(self):
+        async def scenario():
+            stream = note_event_stream(1)
+            try:
+                await anext(stream)  # retry: hint, sent once the hub is subscribed
+                await asyncio.to_thread(_send_note_event, 1, "deleted", {"id": 3})
+                return await self._next_events(stream, 1)
+            finally:
+                await stream.aclose()
+
+        [event] = asyncio.run(scenario())
+        self.assertIn("event: deleted", event)
+        self.assertIn('data: {"id": 3}', event)
+
+    def test_streams_end_when_the_redis_subscription_drops(self):
+        async def listen():
+            await asyncio.sleep(0.05)
+            raise redis.ConnectionError("Connection closed by server.")
+            yield
+
+        pubsub = mock.Mock(psubscribe=mock.AsyncMock(), aclose=mock.AsyncMock(), listen=listen)
+        client = mock.Mock(pubsub=mock.Mock(return_value=pubsub))
+
+        async def scenario():
+            stream = note_event_stream(1)
+            try:
+                await anext(stream)
+                # Only keep-alives would follow if the stream stayed open
+                async with asyncio.timeout(2):
+                    async for _ in stream:
+                        pass
+            finally:
+                await stream.aclose()
+
+        with mock.patch("core.events._async_redis", return_value=client), \
+                self.assertLogs("core.events", "WARNING"):
+            asyncio.run(scenario())
+        self.assertIsNone(hub._reader)
+        self.assertFalse(hub._subscribers)
+
+    def test_note_writes_succeed_when_redis_is_down(self):
+        user = User.objects.create_user(username="gina", password="s3cret-pass")
+        client = APIClient()
+        client.force_authenticate(user)
+        with mock.patch("core.events._redis", side_effect=redis.ConnectionError), \
+                self.assertLogs(level="ERROR"), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = client.post("/api/notes/", {"content": "saved anyway"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Note.objects.filter(content="saved anyway").exists())
+
+    async def test_events_endpoint_requires_authentication(self):
+        response = await self.async_client.get("/api/notes/events/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_events_endpoint_refuses_wsgi(self):
+        response = self.client.get("/api/notes/events/")
+        self.assertEqual(response.status_code, 501)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, NOTE_ARCHIVE_AFTER_DAYS=30, NOTE_ARCHIVE_BATCH_SIZE=2, NOTE_ARCHIVE_MAX_BATCHES=2)
+class NoteArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="carol", password="s3cret-pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        notes = Note.objects.bulk_create(
+            Note(notewriter=self.user, content=f"old note {i}") for i in range(5)
+        )
+        Note.objects.filter(id__in=[note.id for note in notes]).update(
+            updated_at=timezone.now() - timedelta(days=60)
+        )
+        self.fresh = Note.objects.create(notewriter=self.user, content="fresh note")
+
+    def test_archiver_moves_bounded_batches_and_records_progress(self):
+        self.assertEqual(archive_old_notes(), 4)
+        self.assertEqual(ArchivedNote.objects.count(), 4)
+        self.assertEqual(Note.objects.count(), 2)
+
+        self.assertEqual(archive_old_notes(), 1)
+        self.assertEqual(list(Note.objects.all()), [self.fresh])
+        progress = get_archive_progress()
+        self.assertEqual((progress["archived_total"], progress["runs"]), (5, 2))
+        self.assertEqual(progress["last_run_batches"], 1)
+
+    def test_archived_endpoint_returns_decompressed_notes(self):
+        archive_old_notes()
+        archive_old_notes()
+        self.assertEqual(len(self.client.get("/api/notes/").json()), 1)
+
+        response = self.client.get("/api/notes/archived/", {"limit": 2})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["count"], 5)
+        self.assertEqual(len(body["results"]), 2)
+        self.assertTrue(body["results"][0]["content"].startswith("old note"))
+
+    @mock.patch("core.pagination.ArchivePagination.default_limit", 3)
+    def test_archived_endpoint_paginates_without_limit(self):
+        archive_old_notes()
+        archive_old_notes()
+        response = self.client.get("/api/notes/archived/")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["count"], 5)
+        self.assertEqual(len(body["results"]), 3)
+        self.assertIsNotNone(body["next"])
+
+    def test_archiving_keeps_note_history(self):
+        note = Note.objects.order_by("id").first()
+        record_revision(note)
+        content = note.content
+        note.content += "\nedited"
+        record_revision(note, previous_content=content)
+
+        archive_old_notes()
+        archived = ArchivedNote.objects.get(id=note.id)
+        self.assertEqual(archived.revisions.count(), 2)
+        self.assertEqual(reconstruct(archived, 1), content)
+        self.assertEqual(reconstruct(archived, 2), content + "\nedited")
+
+    def test_archive_progress_is_admin_only(self):
+        self.assertEqual(self.client.get("/api/notes/archive-progress/").status_code, 403)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, NOTE_REVISION_SNAPSHOT_INTERVAL=3)
+class NoteRevisionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="dave", password="s3cret-pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        patcher = mock.patch("core.tasks.mark_note_as_old")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_delta_round_trip(self):
+        old = "line one\nline two\nline three\n"
+        new = "line zero\nline one\nline 2\nline three"
+        self.assertEqual(apply_delta(old, make_delta(old, new)), new)
+
+    def test_every_version_can_be_rebuilt(self):
+        # Long enough that a one-line delta is smaller than a full copy
+        versions = ["\n".join(f"draft line {i}" for i in range(30))]
+        note_id = self.client.post("/api/notes/", {"content": versions[0]}, format="json").json()["id"]
+        for i in range(1, 8):
+            versions.append(versions[-1] + f"\nedit {i}")
+            response = self.client.put(f"/api/notes/{note_id}/", {"content": versions[-1]}, format="json")
+            self.assertEqual(response.status_code, 200)
+
+        note = Note.objects.get(id=note_id)
+        revisions = list(note.revisions.order_by("version").values_list("version", "is_snapshot"))
+        self.assertEqual([v for v, snapshot in revisions if snapshot], [1, 4, 7])
+        for version, content in enumerate(versions, start=1):
+            self.assertEqual(reconstruct(note, version), content)
+
+        history = self.client.get(f"/api/notes/{note_id}/history/").json()
+        self.assertEqual([entry["version"] for entry in history], list(range(8, 0, -1)))
+        response = self.client.get(f"/api/notes/{note_id}/history/", {"version": 5})
+        self.assertEqual(response.json()["content"], versions[4])
+        self.assertEqual(
+            self.client.get(f"/api/notes/{note_id}/history/", {"version": 42}).status_code, 404
+        )
+        self.assertEqual(
+            self.client.get(f"/api/notes/{note_id}/history/", {"version": "²"}).status_code, 404
+        )
+
+    def test_notes_without_history_get_a_base_version_on_first_edit(self):
+        note = Note.objects.create(notewriter=self.user, content="legacy")
+        self.client.put(f"/api/notes/{note.id}/", {"content": "legacy\nedited"}, format="json")
+        self.assertEqual(reconstruct(note, 1), "legacy")
+        self.assertEqual(reconstruct(note, 2), "legacy\nedited")
+
+    def test_new_notes_store_no_copy_until_edited(self):
+        note_id = self.client.post("/api/notes/", {"content": "first draft"}, format="json").json()["id"]
+        self.assertFalse(Note.objects.get(id=note_id).revisions.exists())
+        history = self.client.get(f"/api/notes/{note_id}/history/").json()
+        self.assertEqual([entry["version"] for entry in history], [1])
+        response = self.client.get(f"/api/notes/{note_id}/history/", {"version": 1})
+        self.assertEqual(response.json()["content"], "first draft")
+        self.assertEqual(
+            self.client.get(f"/api/notes/{note_id}/history/", {"version": 2}).status_code, 404
+        )
+
+    def test_unchanged_content_does_not_add_a_version(self):
+        note_id = self.client.post("/api/notes/", {"content": "same"}, format="json").json()["id"]
+        response = self.client.patch(f"/api/notes/{note_id}/", {"content": "same"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Note.objects.get(id=note_id).revisions.count(), 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NoteStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="erin", password="s3cret-pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        patcher = mock.patch("core.tasks.mark_note_as_old")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _stats(self):
+        return self.client.get("/api/users/stats/").json()
+
+    def test_counters_follow_note_writes(self):
+        first = self.client.post("/api/notes/", {"content": "héllo"}, format="json").json()
+        self.client.post("/api/notes/", {"content": "world"}, format="json")
+        self.assertEqual((self._stats()["note_count"], self._stats()["content_bytes"]), (2, 11))
+
+        self.client.put(f"/api/notes/{first['id']}/", {"content": "hi"}, format="json")
+        self.assertEqual(self._stats()["content_bytes"], 7)
+
+        self.client.delete(f"/api/notes/{first['id']}/")
+        with self.assertNumQueries(1):
+            stats = self._stats()
+        self.assertEqual((stats["note_count"], stats["content_bytes"]), (1, 5))
+        self.assertIsNotNone(stats["last_updated_at"])
+
+    def test_admin_stats_reject_non_numeric_user(self):
+        self.user.is_staff = True
+        self.user.save()
+        for value in ("abc", "²"):
+            self.assertEqual(self.client.get("/api/users/stats/", {"user": value}).status_code, 400)
+
+    def test_reconcile_repairs_drift(self):
+        Note.objects.create(notewriter=self.user, content="abc")
+        NoteStats.objects.create(user=self.user, note_count=7, content_bytes=1)
+        call_command("reconcile_note_stats", stdout=mock.Mock())
+        stats = NoteStats.objects.get(user=self.user)
+        self.assertEqual((stats.note_count, stats.content_bytes), (1, 3))
+
+    def test_reconcile_for_one_user_only_reads_their_notes(self):
+        other = User.objects.create_user(username="frank", password="s3cret-pass")
+        Note.objects.create(notewriter=self.user, content="abc")
+        Note.objects.create(notewriter=other, content="defg")
+        NoteStats.objects.create(user=other, note_count=7, content_bytes=1)
+
+        self.assertEqual(list(compute_note_stats([self.user.id])), [self.user.id])
+        call_command("reconcile_note_stats", user=[self.user.id], stdout=mock.Mock())
+        stats = NoteStats.objects.get(user=other)
+        self.assertEqual((stats.note_count, stats.content_bytes), (7, 1))
+
+
+class StartupTimeTests(SimpleTestCase):
+    # Generous so it only trips on real regressions (e.g. an eager Celery
+    # import), not on a noisy machine; override with STARTUP_BUDGET_SECONDS.
+    BUDGET = float(os.getenv("STARTUP_BUDGET_SECONDS", "2.0"))
+
+    def test_web_startup_skips_optional_integrations(self):
+        _, loaded, _ = run_target("web")
+        self.assertNotIn("celery.app", loaded)
+        self.assertNotIn("cloudinary", loaded)
+
+    def test_web_startup_within_budget(self):
+        self.assertLess(measure_startup("web", runs=3), self.BUDGET)
+
+
+@override_settings(CELERY_TASK_METRICS_STORE="memory")
+class CeleryQueueTopologyTests(SimpleTestCase):
+    def setUp(self):
+        task_metrics._store = None
+        self.addCleanup(setattr, task_metrics, "_store", None)
+
+    def test_tasks_are_routed_to_their_queues(self):
+        from djtest.celery import app
+
+        def queue_for(name):
+            return app.amqp.router.route({}, name)["queue"].name
+
+        self.assertEqual(queue_for("core.tasks.mark_note_as_old"), "light")
+        self.assertEqual(queue_for("core.tasks.archive_old_notes"), "bulk")
+        self.assertEqual(queue_for("core.tasks.add"), "default")
+
+    def test_fire_and_forget_tasks_do_not_store_results(self):
+        from .tasks import add, mark_note_as_old
+
+        self.assertTrue(mark_note_as_old.ignore_result)
+        self.assertTrue(archive_old_notes.ignore_result)
+        self.assertFalse(add.ignore_result)
+
+    def test_single_queue_worker_gets_queue_settings(self):
+        from djtest.celery import app, apply_queue_worker_settings
+
+        worker = mock.Mock(app=mock.Mock(), concurrency=16, prefetch_multiplier=4)
+        worker.app.amqp.queues.consume_from = {"bulk": app}
+        apply_queue_worker_settings(sender=worker)
+        self.assertEqual((worker.concurrency, worker.prefetch_multiplier), (1, 1))
+
+        worker = mock.Mock(app=mock.Mock(), concurrency=16, prefetch_multiplier=4)
+        worker.app.amqp.queues.consume_from = {"bulk": app, "light": app}
+        apply_queue_worker_settings(sender=worker)
+        self.assertEqual((worker.concurrency, worker.prefetch_multiplier), (16, 4))
+
+    def test_command_line_options_beat_queue_settings(self):
+        from djtest.celery import app, apply_queue_worker_settings
+
+        # As in `celery worker -Q light -c 32`
+        ctx = click.Context(click.Command("worker"))
+        ctx.set_parameter_source("concurrency", ParameterSource.COMMANDLINE)
+        ctx.set_parameter_source("prefetch_multiplier", ParameterSource.DEFAULT)
+        worker = mock.Mock(app=mock.Mock(), concurrency=32, prefetch_multiplier=1)
+        worker.app.amqp.queues.consume_from = {"light": app}
+        with ctx:
+            apply_queue_worker_settings(sender=worker)
+        self.assertEqual((worker.concurrency, worker.prefetch_multiplier), (32, 4))
+
+    def test_signals_record_duration_and_queue_wait(self):
+        task = mock.Mock()
+        task.name = "core.tasks.add"
+        task.request.published_at = time.time() - 0.3
+        task.request.delivery_info = {"routing_key": "default"}
+        task_metrics._record_start(task_id="t1", task=task)
+        task_metrics._record_finish(task_id="t1", task=task)
+
+        metrics = task_metrics.get_task_metrics()
+        wait = metrics[("default:core.tasks.add", "queue_wait")]
+        self.assertEqual(wait["count"], 1)
+        self.assertEqual(task_metrics.quantile(wait, 0.5), 0.5)
+        self.assertEqual(metrics[("default:core.tasks.add", "duration")]["count"], 1)
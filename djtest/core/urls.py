@@ -17,5 +17,6 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('auth/token/verify/', TokenVerifyView.as_view(), name='token_verify'),#for api users
     path('register/', RegisterView.as_view(), name='register'),
+    path('notes/events/', note_events, name='note_events'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -6,23 +6,34 @@ from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
-from django.core.cache import cache
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+import hashlib
+from functools import lru_cache
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework.exceptions import AuthenticationFailed
+from django.template.loader import get_template
+from django.views.decorators.http import condition
 
-from .models import Note
-from .serializers import UserSerializer, NoteSerializer
+from .models import ArchivedNote, Note, NoteStats
+from .serializers import UserSerializer, NoteSerializer, ArchivedNoteSerializer, serialize_note_list
+from .caching import get_or_compute, note_cache_key, invalidate_user_notes
+from .db_router import replica_reads, pin_to_primary
+from .events import publish_note_event, note_event_stream
+from .revisions import record_revision, reconstruct
+from .stats import content_size, record_note_change
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.core.exceptions import ValidationError
 from .api.responses import error_response
 from rest_framework.exceptions import PermissionDenied
 # Import our custom throttle
 from .throttles import LoginRateThrottle
-# Import Celery task
-from .tasks import mark_note_as_old
+from .pagination import ArchivePagination
 
 User = get_user_model()
 
@@ -73,6 +84,26 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def stats(self, request):
+        """Note counters for the current user, or for ?user=<id> when asked by an admin."""
+        user_id = request.user.id
+        requested = request.query_params.get("user")
+        if requested and request.user.is_staff:
+            if not requested.isdecimal():
+                return error_response(
+                    message="Invalid user",
+                    code=status.HTTP_400_BAD_REQUEST,
+                    details={"user": requested},
+                )
+            user_id = int(requested)
+        row = NoteStats.objects.filter(user_id=user_id).values(
+            "note_count", "content_bytes", "last_updated_at"
+        ).first()
+        if row is None:
+            row = {"note_count": 0, "content_bytes": 0, "last_updated_at": None}
+        return Response({"user": user_id, **row})
+
     def handle_exception(self, exc):
         if isinstance(exc, IntegrityError):
             return error_response(
@@ -92,29 +123,116 @@ class NoteViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Note.objects.filter(notewriter=self.request.user).order_by("-updated_at")
 
-    @method_decorator(cache_page(CACHE_TTL, cache="default"), name="list")
-    @method_decorator(cache_page(CACHE_TTL, cache="default"), name="retrieve")
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        # Skip per-row model/field instantiation for the common unpaginated list.
+        # Cache fills read from the primary: a lagging replica's rows would be
+        # cached under the user's current generation and outlive any pin.
+        cache_key = note_cache_key(request.user.id, "list")
+        data = get_or_compute(cache_key, lambda: serialize_note_list(queryset), ttl=CACHE_TTL)
+        response = Response(data)
+        # Lets CompressionMiddleware reuse the compressed body on cache hits
+        response.compressed_cache_key = cache_key
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        data = get_or_compute(
+            note_cache_key(request.user.id, "detail", kwargs[self.lookup_url_kwarg or self.lookup_field]),
+            lambda: self.get_serializer(self.get_object()).data,
+            ttl=CACHE_TTL,
+        )
+        return Response(data)
+
+    @action(detail=False, methods=["get"], pagination_class=ArchivePagination)
+    def archived(self, request):
+        """The user's archived notes, read from the archive table only on request."""
+        queryset = ArchivedNote.objects.filter(notewriter=request.user).order_by("-updated_at")
+        # Only the archiver writes here, so replica lag can't hide a user's own change
+        with replica_reads(request.user.id):
+            page = self.paginate_queryset(queryset)
+            serializer = ArchivedNoteSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["get"], url_path="archive-progress",
+            permission_classes=[permissions.IsAdminUser])
+    def archive_progress(self, request):
+        from .tasks import get_archive_progress
+
+        return Response(get_archive_progress())
+
+    @action(detail=True, methods=["get"])
+    def history(self, request, pk=None):
+        """List a note's versions, or rebuild one with ?version=N."""
+        note = self.get_object()
+        version = request.query_params.get("version")
+        if version is None:
+            revisions = list(
+                note.revisions.order_by("-version").values("version", "is_snapshot", "created_at")
+            )
+            if not revisions:
+                # Never edited: the live content is the only version
+                revisions = [{"version": 1, "is_snapshot": True, "created_at": note.updated_at}]
+            return Response(revisions)
+        content = reconstruct(note, int(version)) if version.isdecimal() else None
+        if content is None:
+            return error_response(
+                message="Version not found",
+                code=status.HTTP_404_NOT_FOUND,
+                details={"version": version},
+            )
+        return Response({"id": note.id, "version": int(version), "content": content})
 
     def perform_create(self, serializer):
-        serializer.save(notewriter=self.request.user)
-        cache.clear()
+        with transaction.atomic():
+            # No revision yet: the first edit stores this content as version 1
+            serializer.save(notewriter=self.request.user)
+            record_note_change(
+                self.request.user.id, count_delta=1, bytes_delta=content_size(serializer.instance.content)
+            )
+        pin_to_primary(self.request.user.id)
+        invalidate_user_notes(self.request.user.id)
+        publish_note_event(self.request.user.id, "created", serializer.data)
 
     def perform_update(self, serializer):
         instance = self.get_object()
         if instance.notewriter != self.request.user:
             raise PermissionDenied("You can only edit your own notes")
-        serializer.save()
-        cache.clear()
-        # enqueue Celery task
+        with transaction.atomic():
+            # Re-read the note under a row lock so concurrent edits are saved
+            # and diffed one after the other, each against the version before it
+            serializer.instance = Note.objects.select_for_update().get(pk=instance.pk)
+            previous_content = serializer.instance.content
+            serializer.save()
+            if serializer.instance.content != previous_content:
+                record_revision(serializer.instance, previous_content=previous_content)
+            record_note_change(
+                self.request.user.id,
+                bytes_delta=content_size(serializer.instance.content) - content_size(previous_content),
+            )
+        pin_to_primary(self.request.user.id)
+        invalidate_user_notes(self.request.user.id)
+        publish_note_event(self.request.user.id, "updated", serializer.data)
+        # enqueue Celery task; imported here so web startup doesn't load Celery
+        from .tasks import mark_note_as_old
+
         mark_note_as_old.delay(instance.id)
 
     def perform_destroy(self, instance):
         if instance.notewriter != self.request.user:
             raise PermissionDenied("You can only delete your own notes")
-        instance.delete()
-        cache.clear()
+        note_id = instance.id
+        with transaction.atomic():
+            instance.delete()
+            record_note_change(
+                self.request.user.id, count_delta=-1, bytes_delta=-content_size(instance.content)
+            )
+        pin_to_primary(self.request.user.id)
+        invalidate_user_notes(self.request.user.id)
+        publish_note_event(self.request.user.id, "deleted", {"id": note_id})
 
     def handle_exception(self, exc):
         if isinstance(exc, PermissionDenied):
@@ -162,4 +280,71 @@ class RegisterView(generics.CreateAPIView):
                 code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 details={"error": str(e)},
             )
-# This view handles user registration, including error handling for common issues.
\ No newline at end of file
+# This view handles user registration, including error handling for common issues.
+
+
+@lru_cache(maxsize=1)
+def _cached_app_shell():
+    content = get_template("index.html").render().encode()
+    return content, hashlib.md5(content, usedforsecurity=False).hexdigest()
+
+
+def _app_shell(request):
+    # Looked up once per request: condition() needs the ETag before the view runs
+    if not hasattr(request, "_app_shell"):
+        # Re-render on every request while developing so edits show up immediately
+        if settings.DEBUG:
+            _cached_app_shell.cache_clear()
+        request._app_shell = _cached_app_shell()
+    return request._app_shell
+
+
+@condition(etag_func=lambda request: _app_shell(request)[1])
+def app_shell(request):
+    """Serve the frontend's index.html, rendered once and kept in memory."""
+    content, _ = _app_shell(request)
+    response = HttpResponse(content)
+    # Always revalidate the shell; the hashed assets it links to are immutable
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+def _authenticate_event_request(request):
+    # EventSource cannot send headers, so the access token may also be
+    # passed as ?token=...
+    auth = JWTAuthentication()
+    try:
+        result = auth.authenticate(request)
+        if result is None and request.GET.get("token"):
+            return auth.get_user(auth.get_validated_token(request.GET["token"]))
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+    return result[0] if result else None
+
+
+async def note_events(request):
+    """
+    Server-sent events stream of the user's note changes.
+
+    Only served under ASGI (djtest.asgi), where each idle connection is a
+    suspended coroutine. A WSGI server would buffer the endless stream and
+    never send a byte, so the request is refused there.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"error": {"code": 501, "message": "Event stream requires the ASGI server", "details": {}}},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    user = await sync_to_async(_authenticate_event_request)(request)
+    if user is None:
+        return JsonResponse(
+            {"error": {"code": 401, "message": "Authentication failed", "details": {}}},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    response = StreamingHttpResponse(
+        note_event_stream(user.id, last_event_id), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
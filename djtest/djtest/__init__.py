@@ -1,7 +1,17 @@
 # djtest/__init__.py
 
-from .celery import app as celery_app
+# The Celery app is loaded on first use rather than with the package, so web
+# processes that never enqueue a task don't pay for importing Celery.
+# `celery -A djtest` finds it through djtest.celery, and core.tasks imports it
+# so shared_task always binds to this app.
+
+
+def __getattr__(name):
+    if name == "celery_app":
+        from .celery import app
+
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ("celery_app",)
-# This will make sure the app is always imported when
-# Django starts so that shared_task will use this app.
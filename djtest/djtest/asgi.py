@@ -2,6 +2,9 @@
 ASGI config for djtest project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The API is served over WSGI; this entry point runs the long-lived
+/api/notes/events/ streams (e.g. uvicorn djtest.asgi:application), so each
+idle connection doesn't hold a thread.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -2,6 +2,7 @@
 
 import os
 from celery import Celery
+from celery.signals import worker_init
 
 # 1) Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "djtest.settings")
@@ -16,3 +17,29 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 
 # 4) Autodiscover tasks from all INSTALLED_APPS (looks for tasks.py in each)
 app.autodiscover_tasks()
+
+# 5) Collect per-queue task duration and queue-wait histograms
+import core.task_metrics  # noqa: E402,F401
+
+
+@worker_init.connect
+def apply_queue_worker_settings(sender=None, **kwargs):
+    """
+    Give a worker that consumes a single queue that queue's concurrency and
+    prefetch multiplier from CELERY_QUEUE_WORKER_SETTINGS. Runs before the
+    pool and consumer are built. These are only defaults: -c and
+    --prefetch-multiplier given on the command line win.
+    """
+    import click
+    from click.core import ParameterSource
+    from django.conf import settings
+
+    queues = list(sender.app.amqp.queues.consume_from or {})
+    if len(queues) != 1:
+        return
+    # The worker command fills unset options from the app config, so the
+    # values alone can't tell whether the operator passed them
+    ctx = click.get_current_context(silent=True)
+    for option, value in settings.CELERY_QUEUE_WORKER_SETTINGS.get(queues[0], {}).items():
+        if ctx is None or ctx.get_parameter_source(option) is not ParameterSource.COMMANDLINE:
+            setattr(sender, option, value)
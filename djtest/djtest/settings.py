@@ -1,14 +1,17 @@
 import os
 from pathlib import Path
-import sys
 from datetime import timedelta
-from dotenv import load_dotenv
-load_dotenv()
-import cloudinary
-from django.core.exceptions import ImproperlyConfigured
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Load a local .env if there is one (in Docker the variables come from
+# env_file instead). An explicit path avoids python-dotenv's directory walk.
+for env_file in (BASE_DIR / ".env", BASE_DIR.parent / ".env"):
+    if env_file.exists():
+        from dotenv import load_dotenv
+        load_dotenv(env_file)
+        break
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
@@ -17,7 +20,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = "django-insecure-fex3ruhx(2x!%dfa!i60+l_lpds$&7ac^oe0$$td%r___s9@uz"
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv("DEBUG", "0").lower() in ("1", "true", "yes")
 
 ALLOWED_HOSTS = ["*"]
 
@@ -35,14 +38,20 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
     'rest_framework_simplejwt',
-    'cloudinary',
     'rest_framework_simplejwt.token_blacklist',
     "django_redis",
 
 ]
 
+# Cloudinary is only loaded when it is configured; importing it costs every
+# web and Celery process startup time.
+if os.getenv("CLOUDINARY_URL"):
+    INSTALLED_APPS.append("cloudinary")
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.CompressionMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     'corsheaders.middleware.CorsMiddleware',
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -54,10 +63,14 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "djtest.urls"
 
+# Optional React build (reactnote/dist) served by Django instead of nginx.
+# Build it with `npm run build -- --base=/static/` so asset URLs land under STATIC_URL.
+FRONTEND_DIST_DIR = os.getenv("FRONTEND_DIST_DIR")
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [],
+        "DIRS": [FRONTEND_DIST_DIR] if FRONTEND_DIST_DIR else [],
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -106,6 +119,42 @@ DATABASES = {
     }
 }
 
+# Read replicas for note reads (see core/db_router.py).
+# Locally, point SQLITE_REPLICAS at copies of db.sqlite3, e.g.
+#   SQLITE_REPLICAS=replica1.sqlite3,replica2.sqlite3
+SQLITE_REPLICAS = [path for path in os.getenv("SQLITE_REPLICAS", "").split(",") if path]
+for index, path in enumerate(SQLITE_REPLICAS, start=1):
+    DATABASES[f"replica{index}"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / path,
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["core.db_router.PrimaryReplicaRouter"]
+# Seconds a user's reads stay on the primary after they write (read-your-writes)
+REPLICA_PIN_SECONDS = 5
+# Seconds between connection checks of a replica
+REPLICA_HEALTH_CHECK_INTERVAL = 10
+
+# Response compression (core.middleware.CompressionMiddleware)
+COMPRESSION_MIN_SIZE = 1024  # bytes; smaller bodies are sent as-is
+COMPRESSION_LEVELS = {"br": 4, "zstd": 3, "gzip": 6}
+# API payloads only: HTML is left out because compressing pages that carry a
+# CSRF token alongside user input opens them to BREACH
+COMPRESSION_CONTENT_TYPES = [
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "image/svg+xml",
+    "text/event-stream",
+]
+# Seconds to keep compressed bodies of cached responses (0 disables)
+COMPRESSION_CACHE_TTL = 60 * 5
+
+# Note history (core/revisions.py): every Nth version is stored in full
+NOTE_REVISION_SNAPSHOT_INTERVAL = 10
+
 #redis settings
 
 # settings.py (below the imports)
@@ -126,12 +175,16 @@ CACHES = {
     }
 }
 
-# Immediately print/log the Redis URL so you see it on startup
-print(f"[Django] Using Redis cache at: {REDIS_URL!r}")
 # (Optional) Use Redis for session storage
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
 
+# Note change push (core/events.py)
+NOTE_EVENTS_STREAM_MAXLEN = 1000  # events kept per user for Last-Event-ID replay
+NOTE_EVENTS_QUEUE_SIZE = 100  # undelivered events per connection before it is dropped
+NOTE_EVENTS_HEARTBEAT = 15  # seconds between keep-alive comments
+NOTE_EVENTS_RETRY_MS = 3000  # client reconnect delay
+
 #celery settings
 # settings.py (continued)
 
@@ -139,8 +192,47 @@ SESSION_CACHE_ALIAS = "default"
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL
 
+# Periodic tasks (run `celery -A djtest beat` alongside the worker)
+CELERY_BEAT_SCHEDULE = {
+    "archive-old-notes": {
+        "task": "core.tasks.archive_old_notes",
+        "schedule": 60 * 60,  # hourly; each run is bounded, see below
+    },
+}
+
+# Note archival (core.tasks.archive_old_notes)
+NOTE_ARCHIVE_AFTER_DAYS = 365  # notes not updated for this long are archived
+NOTE_ARCHIVE_BATCH_SIZE = 500  # notes moved per transaction
+NOTE_ARCHIVE_MAX_BATCHES = 20  # batches per run
+
+# Results are only stored for tasks that opt in with ignore_result=False;
+# nothing reads the results of fire-and-forget tasks.
+CELERY_TASK_IGNORE_RESULT = True
 # (Optional) If you want task results to expire after, say, 1 hour:
-CELERY_TASK_RESULT_EXPIRES = 60 * 60  # seconds
+CELERY_RESULT_EXPIRES = 60 * 60  # seconds
+
+# Queues: "light" for quick per-request tasks, "bulk" for long maintenance
+# jobs, "default" for everything else. Each gets its own worker
+# (`celery -A djtest worker -Q light`, see docker-compose.yml) so light
+# tasks never wait behind bulk ones.
+CELERY_TASK_DEFAULT_QUEUE = "default"
+CELERY_TASK_ROUTES = {
+    "core.tasks.mark_note_as_old": {"queue": "light", "priority": 0},
+    "core.tasks.archive_old_notes": {"queue": "bulk", "priority": 9},
+}
+# Redis emulates priorities with one list per step; 0 is served first
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "queue_order_strategy": "priority",
+    "priority_steps": [0, 3, 6, 9],
+}
+# Applied when a worker consumes a single queue (djtest/celery.py)
+CELERY_QUEUE_WORKER_SETTINGS = {
+    "light": {"concurrency": 8, "prefetch_multiplier": 4},
+    "bulk": {"concurrency": 1, "prefetch_multiplier": 1},
+    "default": {"concurrency": 4, "prefetch_multiplier": 1},
+}
+# Where task duration / queue-wait histograms go: "redis" or "memory"
+CELERY_TASK_METRICS_STORE = "redis"
 
 # You can also add any Celery‐specific settings you need:
 # CELERY_ACCEPT_CONTENT = ["json"]
@@ -188,6 +280,17 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
+STATICFILES_DIRS = [FRONTEND_DIST_DIR] if FRONTEND_DIST_DIR else []
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    # Writes hashed names plus .gz/.br siblings at collectstatic time
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
+# Hashed files (Django's name.<12 hex>.ext and Vite's assets/name-<8 chars>.ext)
+# are served with a one-year immutable Cache-Control.
+WHITENOISE_IMMUTABLE_FILE_TEST = r"(\.[0-9a-f]{12}|/assets/.+-[A-Za-z0-9_-]{8})\.\w+$"
+# Don't break pages when a file is missing from the manifest (e.g. in tests)
+WHITENOISE_MANIFEST_STRICT = False
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
@@ -1,10 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include
-from django.views.generic import TemplateView
+from core.views import app_shell
 urlpatterns = [
     path("admin/", admin.site.urls),
     path('api/', include('core.urls') ),
-    path('', TemplateView.as_view(template_name='index.html'), name='app'),
+    path('', app_shell, name='app'),
 ]
 
 #serve satatic and media
@@ -13,7 +13,7 @@ from django.conf import settings
 from .settings import DEBUG
 # handle static files
     
+# static files are served by WhiteNoiseMiddleware
 if DEBUG:
-    # serve static files and media
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+    # serve media
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""Measure process startup time for the web app and the Celery worker.
+
+    python startup_profile.py                 # wall-clock medians
+    python startup_profile.py --importtime    # plus the slowest imports (-X importtime)
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# Each snippet does what the process does before it can serve its first
+# request or task, then prints the elapsed time and any heavy modules loaded.
+TARGETS = {
+    "web": (
+        "from djtest.wsgi import application\n"
+        "from django.urls import get_resolver\n"
+        "get_resolver().url_patterns\n"
+    ),
+    "celery": (
+        "from djtest import celery_app\n"
+        "import django; django.setup()\n"
+        "celery_app.loader.import_default_modules()\n"
+    ),
+}
+
+HEAVY_MODULES = ("celery.app", "cloudinary", "dotenv")
+
+_RUNNER = """
+import os, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "djtest.settings")
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(elapsed, ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def run_target(name, importtime=False):
+    """Start a fresh interpreter for one target; return (seconds, heavy modules, stderr)."""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", _RUNNER.format(code=TARGETS[name], heavy=HEAVY_MODULES)]
+    result = subprocess.run(command, cwd=BASE_DIR, capture_output=True, text=True, check=True,
+                            env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    elapsed, _, loaded = result.stdout.strip().splitlines()[-1].partition(" ")
+    return float(elapsed), [m for m in loaded.split(",") if m], result.stderr
+
+
+def measure_startup(name, runs=5):
+    """Median wall-clock startup time of a target over several fresh processes."""
+    return statistics.median(run_target(name)[0] for _ in range(runs))
+
+
+def slowest_imports(stderr, limit=20):
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        # Only report top-level imports; nested ones are included in their parents
+        if module.startswith("  "):
+            continue
+        rows.append((int(cumulative), module.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true")
+    args = parser.parse_args()
+
+    for name in TARGETS:
+        median = measure_startup(name, args.runs)
+        _, loaded, stderr = run_target(name, importtime=args.importtime)
+        print(f"{name:7} {median * 1000:8.1f} ms (median of {args.runs})  heavy modules: {', '.join(loaded) or '-'}")
+        if args.importtime:
+            for cumulative, module in slowest_imports(stderr):
+                print(f"    {cumulative / 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()